@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException
-import subprocess
 import asyncio
 import re
+import time
 import logging
 import pty
 import os
-import select
 import json
+
+import orjson
 from pathlib import Path
 from typing import Optional
 from app.core.config import settings
+from app.core.terminal_utils import clean_ansi_bytes
 from app.models import AuthLoginResponse, AuthStatusResponse, AuthInjectTokenRequest
 
 # Set up logger for auth controller
@@ -20,7 +22,6 @@ router = APIRouter(tags=["auth"])
 # Authentication timing constants
 AUTH_TIMING = {
     'initial_wait': 4.0,       # Wait before typing
-    'char_delay': 0.1,         # Delay between characters  
     'enter_delay': 1.0,        # Wait before pressing Enter
     'auth_timeout': 25,        # Device code extraction timeout
     'monitor_timeout': 600     # Background monitoring timeout (10 min)
@@ -28,10 +29,28 @@ AUTH_TIMING = {
 
 GITHUB_DEVICE_URL = "https://github.com/login/device"
 
-def clean_ansi_codes(text: str) -> str:
-    """Remove ANSI escape codes from text to make it readable"""
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text)
+# OpenCode always prints exactly "Enter code: XXXX-XXXX"; compiled once here
+# rather than per PTY chunk, kept as fallback for oddly wrapped output
+_DEVICE_CODE_RE = re.compile(r'Enter code:\s*([A-Z0-9]{4}-[A-Z0-9]{4})')
+
+
+def _extract_device_code(text: str) -> Optional[str]:
+    """Pull the XXXX-XXXX device code out of an 'Enter code:' line"""
+    # Fast path: find the anchor and slice - the code immediately follows,
+    # so a memchr-backed find plus two isalnum checks beats the regex engine
+    idx = text.find('Enter code:')
+    if idx != -1:
+        tail = text[idx + 11:idx + 64].strip()
+        if len(tail) >= 9 and tail[4] == '-' and tail[:4].isalnum() and tail[5:9].isalnum():
+            return tail[:9].upper()
+
+    match = _DEVICE_CODE_RE.search(text)
+    return match.group(1) if match else None
+
+
+# auth.json rarely changes between status polls; remember the token per mtime
+# so repeat reads cost a single stat instead of an open + JSON parse
+_auth_file_cache = {"mtime": 0, "token": None}
 
 def _get_github_copilot_refresh_token() -> Optional[str]:
     """Read GitHub Copilot refresh token from OpenCode auth.json file"""
@@ -39,18 +58,25 @@ def _get_github_copilot_refresh_token() -> Optional[str]:
         # Use the same path structure as the agent service
         opencode_storage_path = Path.home() / ".local" / "share" / "opencode"
         auth_file_path = opencode_storage_path / "auth.json"
-        
-        if not auth_file_path.exists():
+
+        try:
+            file_stat = auth_file_path.stat()
+        except FileNotFoundError:
             logger.debug(f"Auth file not found at {auth_file_path}")
             return None
-        
-        with open(auth_file_path, 'r', encoding='utf-8') as f:
-            auth_data = json.load(f)
-        
+
+        if file_stat.st_mtime_ns == _auth_file_cache["mtime"]:
+            return _auth_file_cache["token"]
+
+        auth_data = orjson.loads(auth_file_path.read_bytes())
+
         # Extract GitHub Copilot refresh token
         github_copilot_auth = auth_data.get("github-copilot", {})
         refresh_token = github_copilot_auth.get("refresh")
-        
+
+        _auth_file_cache["mtime"] = file_stat.st_mtime_ns
+        _auth_file_cache["token"] = refresh_token
+
         if refresh_token:
             logger.debug("Successfully retrieved GitHub Copilot refresh token")
             return refresh_token
@@ -82,8 +108,7 @@ def _inject_github_copilot_refresh_token(refresh_token: str) -> bool:
         auth_data = {}
         if auth_file_path.exists():
             try:
-                with open(auth_file_path, 'r', encoding='utf-8') as f:
-                    auth_data = json.load(f)
+                auth_data = orjson.loads(auth_file_path.read_bytes())
             except (json.JSONDecodeError, Exception) as e:
                 logger.warning(f"Failed to read existing auth.json, creating new: {e}")
                 auth_data = {}
@@ -98,9 +123,11 @@ def _inject_github_copilot_refresh_token(refresh_token: str) -> bool:
             # Note: We don't set access token or expires as those will be handled by OpenCode
         })
         
-        # Write updated auth data
-        with open(auth_file_path, 'w', encoding='utf-8') as f:
-            json.dump(auth_data, f, indent=2)
+        # Write updated auth data atomically so a crash or concurrent reader
+        # never observes a truncated auth.json
+        tmp_path = auth_file_path.with_suffix('.json.tmp')
+        tmp_path.write_bytes(orjson.dumps(auth_data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, auth_file_path)
         
         logger.info("Successfully injected GitHub Copilot refresh token")
         return True
@@ -111,39 +138,96 @@ def _inject_github_copilot_refresh_token(refresh_token: str) -> bool:
 
 # Store ongoing auth process
 _auth_process = None
+_auth_login_lock = asyncio.Lock()
+
+# Short-lived cache for /auth/status so a polling UI doesn't fork/exec
+# `opencode auth list` on every request; login and token injection
+# invalidate it, so a longer TTL only delays noticing external changes
+_STATUS_CACHE_TTL = 5.0
+_status_cache = {"t": 0.0, "val": None}
+
+# In-flight status check shared by concurrent /auth/status requests
+_status_inflight: Optional[asyncio.Future] = None
+
+def _invalidate_status_cache():
+    """Drop the cached auth status after anything that changes auth state"""
+    _status_cache["val"] = None
+
+async def _is_github_copilot_authenticated() -> bool:
+    """Check `opencode auth list` for GitHub Copilot without blocking the event loop"""
+    proc = await asyncio.create_subprocess_exec(
+        settings.opencode_command, "auth", "list",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+
+    output = stdout.decode('utf-8', errors='replace')
+    return bool(
+        proc.returncode == 0 and
+        output.strip() and
+        "GitHub Copilot" in output and
+        "Commands:" not in output  # Not help text
+    )
 
 async def _monitor_auth_background(process, master_fd):
     """Monitor auth process in background after device code is returned"""
     try:
-        start_time = asyncio.get_event_loop().time()
-        max_wait_seconds = AUTH_TIMING['monitor_timeout']
-        
-        while (asyncio.get_event_loop().time() - start_time) < max_wait_seconds:
+        # The master fd was already made non-blocking by auth_login; bridge it
+        # into the event loop the same way rather than select-polling
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        def _on_readable():
             try:
-                ready, _, _ = select.select([master_fd], [], [], 1.0)  # 1 second timeout
-                
-                if ready:
-                    data = os.read(master_fd, 1024).decode('utf-8', errors='replace')
-                    if data:
-                        clean_line = clean_ansi_codes(data).strip()
-                        # Log only "Done" completion (specific message we know)
-                        if "Done" in clean_line:
-                            logger.info(f"🏁 AUTH COMPLETED: {clean_line}")
-                            break
-                            
-            except (OSError, ValueError):
+                while True:
+                    chunk = os.read(master_fd, 16384)
+                    if not chunk:
+                        loop.remove_reader(master_fd)
+                        chunks.put_nowait(b'')
+                        return
+                    chunks.put_nowait(chunk)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
                 # Process ended or PTY closed
-                break
-                
-            await asyncio.sleep(1.0)
-        
+                loop.remove_reader(master_fd)
+                chunks.put_nowait(b'')
+
+        loop.add_reader(master_fd, _on_readable)
+        try:
+            deadline = loop.time() + AUTH_TIMING['monitor_timeout']
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    raw = await asyncio.wait_for(chunks.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if not raw:
+                    break  # PTY closed
+
+                clean_line = clean_ansi_bytes(raw).decode('utf-8', errors='replace').strip()
+                # Log only "Done" completion (specific message we know)
+                if "Done" in clean_line:
+                    logger.info(f"🏁 AUTH COMPLETED: {clean_line}")
+                    break
+        finally:
+            loop.remove_reader(master_fd)
+
         # Cleanup
         try:
             os.close(master_fd)
-            process.wait()
+            await process.wait()
         except:
             pass
-            
+
     except Exception as e:
         logger.error(f"Background monitoring error: {e}")
         try:
@@ -165,106 +249,132 @@ async def auth_login():
             detail=f"OpenCode command not found: {settings.opencode_command}"
         )
     
-    # Always clean up any previous process and start fresh
-    if _auth_process:
+    # Only one login flow may own the auth process/PTY at a time
+    async with _auth_login_lock:
+        # Always clean up any previous process and start fresh
+        if _auth_process:
+            try:
+                if _auth_process.returncode is None:  # Process still running
+                    logger.info("Terminating existing auth process to start fresh")
+                    _auth_process.terminate()
+                    try:
+                        await asyncio.wait_for(_auth_process.wait(), timeout=2)  # Wait up to 2 seconds for graceful termination
+                    except asyncio.TimeoutError:
+                        _auth_process.kill()  # Force kill if it doesn't terminate gracefully
+            except:
+                pass
+
         try:
-            if _auth_process.poll() is None:  # Process still running
-                logger.info("Terminating existing auth process to start fresh")
-                _auth_process.terminate()
-                try:
-                    _auth_process.wait(timeout=2)  # Wait up to 2 seconds for graceful termination
-                except subprocess.TimeoutExpired:
-                    _auth_process.kill()  # Force kill if it doesn't terminate gracefully
-        except:
-            pass
-    
-    try:
-        # Create PTY for interactive terminal
-        master_fd, slave_fd = pty.openpty()
-        
-        # Start auth process
-        _auth_process = subprocess.Popen(
-            [settings.opencode_command, "auth", "login"],
-            stdin=slave_fd,
-            stdout=slave_fd,
-            stderr=slave_fd,
-            text=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-        
-        os.close(slave_fd)
-        logger.info(f"Auth process started with PID: {_auth_process.pid}")
-        
-        # Wait and type "GitHub Copilot" (exact working sequence)
-        await asyncio.sleep(AUTH_TIMING['initial_wait'])
-        for char in 'GitHub Copilot':
-            os.write(master_fd, char.encode())
-            await asyncio.sleep(AUTH_TIMING['char_delay'])
-        await asyncio.sleep(AUTH_TIMING['enter_delay'])
-        os.write(master_fd, b'\r')
-        
-        # Monitor for device code and URL
-        device_code = None
-        verification_url = None
-        start_time = asyncio.get_event_loop().time()
+            # Create PTY for interactive terminal
+            master_fd, slave_fd = pty.openpty()
+
+            # Start auth process (asyncio-native so waits never block the loop)
+            _auth_process = await asyncio.create_subprocess_exec(
+                settings.opencode_command, "auth", "login",
+                stdin=slave_fd,
+                stdout=slave_fd,
+                stderr=slave_fd
+            )
         
-        while (asyncio.get_event_loop().time() - start_time) < AUTH_TIMING['auth_timeout']:
+            os.close(slave_fd)
+            logger.info(f"Auth process started with PID: {_auth_process.pid}")
+
+            # Bridge the PTY into the event loop: the reader callback drains
+            # available bytes into a queue, so the monitor below wakes up the
+            # moment output arrives instead of sleep-polling every 100 ms.
+            loop = asyncio.get_running_loop()
+            os.set_blocking(master_fd, False)
+            pty_chunks: asyncio.Queue = asyncio.Queue()
+
+            def _on_pty_readable():
+                # Drain everything currently readable so one wakeup handles a
+                # whole TUI redraw instead of one 1 KiB slice per callback
+                try:
+                    while True:
+                        chunk = os.read(master_fd, 16384)
+                        if not chunk:
+                            return
+                        pty_chunks.put_nowait(chunk)
+                except (BlockingIOError, InterruptedError):
+                    return
+                except OSError:
+                    loop.remove_reader(master_fd)
+
+            loop.add_reader(master_fd, _on_pty_readable)
+
             try:
-                ready, _, _ = select.select([master_fd], [], [], 0.1)
-                
-                if ready:
-                    data = os.read(master_fd, 1024).decode('utf-8', errors='replace')
-                    clean_line = clean_ansi_codes(data).strip()
-                    
+                # Wait, type "GitHub Copilot" in one write, then press Enter
+                # after a pause. The prompt reads line input, so the old
+                # per-character delays only added ~1.4 s of sleeps and a
+                # syscall per keystroke.
+                await asyncio.sleep(AUTH_TIMING['initial_wait'])
+                os.write(master_fd, b'GitHub Copilot')
+                await asyncio.sleep(AUTH_TIMING['enter_delay'])
+                os.write(master_fd, b'\r')
+
+                # Monitor for device code and URL
+                device_code = None
+                verification_url = None
+                start_time = loop.time()
+                deadline = start_time + AUTH_TIMING['auth_timeout']
+
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        data = await asyncio.wait_for(pty_chunks.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+                    clean_line = clean_ansi_bytes(data).decode('utf-8', errors='replace').strip()
+
                     # Extract device code (always format XXXX-XXXX after "Enter code:")
                     if not device_code and "Enter code:" in clean_line:
-                        code_match = re.search(r'Enter code:\s*([A-Z0-9]{4}-[A-Z0-9]{4})', clean_line)
-                        if code_match:
-                            device_code = code_match.group(1)
+                        device_code = _extract_device_code(clean_line)
+                        if device_code:
                             logger.info(f"Found device code: {device_code}")
-                    
+
                     # Extract verification URL (always same URL)
                     if not verification_url and GITHUB_DEVICE_URL in clean_line:
                         verification_url = GITHUB_DEVICE_URL
                         logger.info(f"Found verification URL: {verification_url}")
-                    
+
                     # Return immediately when both found
                     if device_code and verification_url:
-                        elapsed = asyncio.get_event_loop().time() - start_time
+                        elapsed = loop.time() - start_time
                         logger.info(f"Got auth data after {elapsed:.1f} seconds")
-                        
+                        _invalidate_status_cache()
+
                         # Start background monitoring for completion
                         asyncio.create_task(_monitor_auth_background(_auth_process, master_fd))
-                        
+
                         return AuthLoginResponse(
                             device_code=device_code,
                             verification_url=verification_url
                         )
-                        
-            except OSError:
-                pass
-            
-            await asyncio.sleep(0.1)
-        
-        # Timeout - cleanup and return error
-        logger.error("Timeout waiting for device code")
-        try:
-            os.close(master_fd)
-            _auth_process.terminate()
-        except:
-            pass
-        
-        raise HTTPException(status_code=500, detail="Timeout waiting for authentication data")
-            
-    except Exception as e:
-        logger.error(f"Auth process failed: {e}")
-        if _auth_process:
+            finally:
+                # Harmless if the OSError path above already removed it
+                loop.remove_reader(master_fd)
+
+            # Timeout - cleanup and return error
+            logger.error("Timeout waiting for device code")
             try:
+                os.close(master_fd)
                 _auth_process.terminate()
             except:
                 pass
-        raise HTTPException(status_code=500, detail=f"Authentication failed: {str(e)}")
+
+            raise HTTPException(status_code=500, detail="Timeout waiting for authentication data")
+            
+        except Exception as e:
+            logger.error(f"Auth process failed: {e}")
+            if _auth_process:
+                try:
+                    _auth_process.terminate()
+                except:
+                    pass
+            raise HTTPException(status_code=500, detail=f"Authentication failed: {str(e)}")
 
 @router.get("/auth/status", response_model=AuthStatusResponse)
 async def auth_status():
@@ -275,38 +385,52 @@ async def auth_status():
             detail=f"OpenCode command not found: {settings.opencode_command}"
         )
     
+    global _status_inflight
+
+    # Serve bursts of status polls from the cache instead of re-spawning OpenCode
+    cached = _status_cache["val"]
+    if cached is not None and time.monotonic() - _status_cache["t"] < _STATUS_CACHE_TTL:
+        return cached
+
+    # Single-flight: if another request is already running the check, await
+    # its result instead of spawning one OpenCode child per concurrent poll
+    if _status_inflight is not None:
+        try:
+            return await _status_inflight
+        except asyncio.TimeoutError:
+            return AuthStatusResponse(authenticated=False, refreshToken=None)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Status check failed: {str(e)}")
+
+    future = asyncio.get_running_loop().create_future()
+    _status_inflight = future
     try:
-        result = subprocess.run(
-            [settings.opencode_command, "auth", "list"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-            encoding='utf-8',
-            errors='replace'
-        )
-        
-        # Check if GitHub Copilot is authenticated
-        is_authenticated = (
-            result.returncode == 0 and 
-            result.stdout.strip() and
-            "GitHub Copilot" in result.stdout and 
-            "Commands:" not in result.stdout  # Not help text
-        )
-        
+        is_authenticated = await _is_github_copilot_authenticated()
+
         # Get refresh token if authenticated
         refresh_token = None
         if is_authenticated:
             refresh_token = _get_github_copilot_refresh_token()
-        
-        return AuthStatusResponse(
+
+        response = AuthStatusResponse(
             authenticated=is_authenticated,
             refreshToken=refresh_token
         )
-            
-    except subprocess.TimeoutExpired:
+        _status_cache["t"] = time.monotonic()
+        _status_cache["val"] = response
+        future.set_result(response)
+        return response
+
+    except asyncio.TimeoutError as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved in case no one else is waiting
         return AuthStatusResponse(authenticated=False, refreshToken=None)
     except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved in case no one else is waiting
         raise HTTPException(status_code=500, detail=f"Status check failed: {str(e)}")
+    finally:
+        _status_inflight = None
 
 @router.post("/auth", response_model=AuthStatusResponse)
 async def inject_refresh_token(request: AuthInjectTokenRequest):
@@ -323,35 +447,22 @@ async def inject_refresh_token(request: AuthInjectTokenRequest):
         
         if not success:
             raise HTTPException(
-                status_code=500, 
+                status_code=500,
                 detail="Failed to inject refresh token into auth.json"
             )
-        
+
+        _invalidate_status_cache()
+
         # Verify authentication status after injection
-        result = subprocess.run(
-            [settings.opencode_command, "auth", "list"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-            encoding='utf-8',
-            errors='replace'
-        )
-        
-        # Check if GitHub Copilot is now authenticated
-        is_authenticated = (
-            result.returncode == 0 and 
-            result.stdout.strip() and
-            "GitHub Copilot" in result.stdout and 
-            "Commands:" not in result.stdout  # Not help text
-        )
-        
+        is_authenticated = await _is_github_copilot_authenticated()
+
         # Return the current status including the injected token
         return AuthStatusResponse(
             authenticated=is_authenticated,
             refreshToken=request.refreshToken if is_authenticated else None
         )
-            
-    except subprocess.TimeoutExpired:
+
+    except asyncio.TimeoutError:
         # Return failure status
         return AuthStatusResponse(authenticated=False, refreshToken=None)
     except HTTPException:
@@ -1,91 +1,204 @@
+import asyncio
 import logging
 import mimetypes
+import os
+import stat
 import tempfile
+import time
 import zipfile
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 from app.core.config import settings
 from app.models import SessionFile, SessionListResponse, SessionFilesResponse, ArtifactsUrl, UploadedArtifacts, UploadRequest
 from app.services.azure_storage_service import AzureStorageService
-from app.utils.file_utils import should_exclude_path, TEXT_FILE_ENCODING
+from app.utils.file_utils import walk_files, walk_files_parallel
 
-router = APIRouter(tags=["sessions"])
+# ORJSONResponse serializes large file listings natively instead of walking
+# them through jsonable_encoder + json.dumps
+router = APIRouter(tags=["sessions"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+# Resolved session paths, cached briefly so bursts of file/download requests
+# for the same session skip the app-directory scan. Bounded so unknown
+# session IDs can't grow the dict without limit.
+_SESSION_PATH_TTL = 5.0
+_SESSION_PATH_CACHE_MAX = 1024
+_session_path_cache: dict = {}
+
+def _cache_session_path(session_id: str, path: Path) -> None:
+    """Remember a resolved session path, evicting the oldest entry if full"""
+    if len(_session_path_cache) >= _SESSION_PATH_CACHE_MAX:
+        oldest = min(_session_path_cache, key=lambda k: _session_path_cache[k][1])
+        del _session_path_cache[oldest]
+    _session_path_cache[session_id] = (path, time.monotonic())
+
+# One session-root scan shared by every endpoint that needs the app-*
+# directories; 2s is long enough to cover a request burst, short enough
+# that new app directories show up promptly
+_APP_DIRS_TTL = 2.0
+_app_dirs_cache = {"t": 0.0, "val": None}
+
+def _list_app_dirs(root: Path) -> List[str]:
+    """List paths of app-* directories under the session root, briefly cached"""
+    cached = _app_dirs_cache["val"]
+    if cached is not None and time.monotonic() - _app_dirs_cache["t"] < _APP_DIRS_TTL:
+        return cached
+
+    app_dirs = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.name.startswith("app-") and entry.is_dir(follow_symlinks=False):
+                    app_dirs.append(entry.path)
+    except (OSError, PermissionError):
+        pass
+
+    _app_dirs_cache["val"] = app_dirs
+    _app_dirs_cache["t"] = time.monotonic()
+    return app_dirs
+
 def find_session_path(session_id: str) -> Optional[Path]:
     """Find session path across all app directories"""
     session_root = settings.session_root
-    
-    # Search for session across all app directories
-    for app_dir in session_root.glob("app-*"):
-        if app_dir.is_dir():
-            potential_path = app_dir / session_id
-            if potential_path.exists() and potential_path.is_dir():
-                return potential_path
-    
+
+    cached = _session_path_cache.get(session_id)
+    if cached is not None:
+        path, cached_at = cached
+        if time.monotonic() - cached_at < _SESSION_PATH_TTL and path.exists():
+            return path
+
+    # Search for session across all app directories; probe with os.path so
+    # Path objects are only built for the hit
+    for app_dir in _list_app_dirs(session_root):
+        candidate = os.path.join(app_dir, session_id)
+        if os.path.isdir(candidate):
+            potential_path = Path(candidate)
+            _cache_session_path(session_id, potential_path)
+            return potential_path
+
+    _session_path_cache.pop(session_id, None)
     return None
 
+# Steady-state polling of /sessions is served from this cache; task creation
+# invalidates it so new sessions show up immediately
+_SESSIONS_TTL = 10.0
+_sessions_cache = {"t": 0.0, "val": None}
+
+def invalidate_sessions_cache() -> None:
+    """Drop the cached /sessions listing (called when a session is created)"""
+    _sessions_cache["val"] = None
+    _app_dirs_cache["val"] = None
+
+def _scan_app_dir(app_dir: str) -> set:
+    """Collect session directory names from one app directory"""
+    sessions = set()
+    try:
+        with os.scandir(app_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    sessions.add(entry.name)
+    except (OSError, PermissionError):
+        pass
+    return sessions
+
 @router.get("/sessions", response_model=SessionListResponse)
 async def get_sessions() -> SessionListResponse:
     """Get list of all available sessions"""
-    sessions = set()
     session_root = settings.session_root
-    
-    # Search for sessions across all app directories
-    for app_dir in session_root.glob("app-*"):
-        if app_dir.is_dir():
-            # Each subdirectory in app-* is a session
-            for session_dir in app_dir.iterdir():
-                if session_dir.is_dir():
-                    sessions.add(session_dir.name)
-    
-    session_list = sorted(list(sessions))
+
+    cached = _sessions_cache["val"]
+    if cached is not None and time.monotonic() - _sessions_cache["t"] < _SESSIONS_TTL:
+        session_list = cached
+    else:
+        # Each subdirectory in app-* is a session; scan app directories in
+        # parallel worker threads so their I/O waits overlap
+        app_dirs = _list_app_dirs(session_root)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(_scan_app_dir, d) for d in app_dirs)
+        )
+        # Dedupe and sort in one pass over the chained per-directory results
+        session_list = sorted(set(chain.from_iterable(results)))
+        _sessions_cache["val"] = session_list
+        _sessions_cache["t"] = time.monotonic()
     return SessionListResponse(
         sessions=session_list,
         total_sessions=len(session_list)
     )
 
+def _scan_session_files(session_path: Path) -> List[SessionFile]:
+    """Walk a session directory and build its file listing (blocking)"""
+    files = []
+    try:
+        for entry, relative_path in walk_files_parallel(session_path):
+            try:
+                entry_stat = entry.stat()
+
+                files.append(SessionFile(
+                    name=entry.name,
+                    path=relative_path,
+                    size=entry_stat.st_size,
+                    modified=entry_stat.st_mtime,
+                    type="file"
+                ))
+            except (OSError, PermissionError):
+                # Skip files we can't access
+                logger.debug(f"Skipping file due to access error: {entry.path}")
+                continue
+    except (OSError, PermissionError) as e:
+        logger.error(f"Error listing session files in {session_path}: {e}")
+    return files
+
 @router.get("/sessions/{session_id}/files", response_model=SessionFilesResponse)
 async def get_session_files(session_id: str) -> SessionFilesResponse:
     """Get files in session by session ID"""
     session_path = find_session_path(session_id)
     if not session_path:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    files = []
-    try:
-        for file_path in session_path.rglob("*"):
-            if file_path.is_file() and not should_exclude_path(file_path):
-                try:
-                    stat = file_path.stat()
-                    relative_path = file_path.relative_to(session_path)
-                    
-                    files.append(SessionFile(
-                        name=file_path.name,
-                        path=str(relative_path),
-                        size=stat.st_size,
-                        modified=datetime.fromtimestamp(stat.st_mtime),
-                        type="file"
-                    ))
-                except (OSError, PermissionError):
-                    # Skip files we can't access
-                    logger.debug(f"Skipping file due to access error: {file_path}")
-                    continue
-    except (OSError, PermissionError) as e:
-        logger.error(f"Error listing session files in {session_path}: {e}")
-    
+
+    # The walk stats every file; run it in a worker thread so slow or
+    # cold-cache disks don't stall the event loop
+    files = await asyncio.to_thread(_scan_session_files, session_path)
+
     return SessionFilesResponse(
         files=files,
         total_files=len(files),
         session_id=session_id
     )
 
+# Resolved (symlink-free) session roots; sessions don't move once created,
+# so each root's realpath is computed once
+_resolved_root_cache: dict = {}
+
+# Content types for the extensions sessions actually contain, so the common
+# case is a dict lookup instead of a mimetypes database walk per download
+_EXT_TO_MIME = {
+    '.py': 'text/x-python',
+    '.js': 'application/javascript',
+    '.ts': 'application/typescript',
+    '.json': 'application/json',
+    '.md': 'text/markdown',
+    '.html': 'text/html',
+    '.txt': 'text/plain',
+    '.log': 'text/plain',
+}
+
+# Load the mimetypes database at import rather than on the first download
+mimetypes.init()
+
+
+@lru_cache(maxsize=512)
+def _guess_mime(suffix: str) -> Optional[str]:
+    """Cached mimetypes lookup for extensions outside _EXT_TO_MIME"""
+    return mimetypes.guess_type(f"x{suffix}")[0]
+
 @router.get("/sessions/{session_id}/files/{file_path:path}")
 async def download_session_file(session_id: str, file_path: str):
     """Download a specific file from session"""
@@ -94,69 +207,163 @@ async def download_session_file(session_id: str, file_path: str):
         raise HTTPException(status_code=404, detail="Session not found")
     
     full_file_path = session_path / file_path
-    
-    # Security check: ensure file is within session directory
-    try:
-        full_file_path.resolve().relative_to(session_path.resolve())
-    except ValueError:
+
+    # Security check: ensure file is within session directory. The session
+    # root's resolution is memoized (sessions don't move); the per-request
+    # path resolves in a worker thread since realpath walks a syscall chain.
+    resolved_session = _resolved_root_cache.get(session_path)
+    if resolved_session is None:
+        resolved_session = os.path.realpath(session_path)
+        _resolved_root_cache[session_path] = resolved_session
+    resolved_full = await asyncio.to_thread(os.path.realpath, full_file_path)
+    if not resolved_full.startswith(resolved_session + os.sep):
         raise HTTPException(status_code=403, detail="Access denied: file outside session directory")
-    
-    if not full_file_path.exists() or not full_file_path.is_file():
+
+    # One stat covers both the existence and the regular-file check
+    try:
+        st = os.stat(resolved_full)
+    except OSError:
         raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Determine content type - common session file types resolve via a dict
+    # lookup, anything else falls back to the mimetypes database
+    suffix = full_file_path.suffix.lower()
+    content_type = _EXT_TO_MIME.get(suffix) or _guess_mime(suffix)
     
-    # Determine content type
-    content_type, _ = mimetypes.guess_type(str(full_file_path))
-    
-    # For text files, return as plain text to display in browser
-    if content_type and content_type.startswith('text/'):
-        try:
-            with open(full_file_path, 'r', encoding=TEXT_FILE_ENCODING) as f:
-                content = f.read()
-            return PlainTextResponse(content=content, media_type=content_type)
-        except (UnicodeDecodeError, PermissionError):
-            pass  # Fall back to file download
-    
+    # Always serve through FileResponse: Starlette uses sendfile(2) where
+    # available, a zero-copy kernel transfer that beats reading text files
+    # into Python strings. Text types are marked inline so browsers still
+    # display them instead of downloading.
+    is_text = content_type is not None and content_type.startswith('text/')
     return FileResponse(
-        path=str(full_file_path),
+        path=resolved_full,
         filename=full_file_path.name,
-        media_type=content_type or 'application/octet-stream'
+        media_type=content_type or 'application/octet-stream',
+        content_disposition_type='inline' if is_text else 'attachment'
     )
 
+# How long the ZIP producer thread waits on a stalled/disconnected client
+# before giving up
+ZIP_STREAM_CHUNK_TIMEOUT = 60
+
+# In-flight ZIP producer tasks, referenced so they are not garbage collected
+_zip_producers: set = set()
+
+# At most this many ZIP builds at once - each one occupies a worker thread
+# and can saturate a core, so unbounded concurrency starves everything else
+_ZIP_SEM = asyncio.Semaphore(2)
+
+
+class _ZipStreamWriter:
+    """File-like object that forwards zipfile writes into an asyncio queue"""
+
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._queue = queue
+        self._loop = loop
+        self._pos = 0
+
+    def write(self, data) -> int:
+        if data:
+            future = asyncio.run_coroutine_threadsafe(
+                self._queue.put(bytes(data)), self._loop
+            )
+            future.result(timeout=ZIP_STREAM_CHUNK_TIMEOUT)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+
+# Formats that are already compressed - deflating them again burns CPU for
+# no size win, so they are always stored as-is
+_PRECOMPRESSED_EXTS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip', '.gz', '.tgz',
+    '.bz2', '.xz', '.7z', '.pdf', '.mp4', '.webm', '.woff', '.woff2'
+})
+
+
+def _write_session_zip(session_path: Path, zipf: zipfile.ZipFile) -> None:
+    """Write all non-excluded session files into an open ZipFile"""
+    for entry, relative_path in walk_files(session_path):
+        try:
+            name = entry.name
+            dot = name.rfind('.')
+            if dot != -1 and name[dot:].lower() in _PRECOMPRESSED_EXTS:
+                zipf.write(entry.path, relative_path, compress_type=zipfile.ZIP_STORED)
+            else:
+                zipf.write(entry.path, relative_path)
+        except (OSError, PermissionError):
+            continue
+
+
 @router.get("/sessions/{session_id}/download")
-async def download_session_zip(session_id: str):
-    """Download complete session folder as ZIP file"""
+async def download_session_zip(session_id: str, compress: bool = False):
+    """Download complete session folder as a streamed ZIP file"""
     session_path = find_session_path(session_id)
     if not session_path:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Create temporary ZIP file
-    temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-    zip_path = temp_zip.name
-    temp_zip.close()
-    
-    try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in session_path.rglob("*"):
-                if file_path.is_file() and not should_exclude_path(file_path):
-                    try:
-                        relative_path = file_path.relative_to(session_path)
-                        zipf.write(file_path, relative_path)
-                    except (OSError, PermissionError):
-                        continue
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"session_{session_id}_{timestamp}.zip"
-        
-        return FileResponse(
-            path=zip_path,
-            filename=filename,
-            media_type='application/zip'
-        )
-        
-    except Exception as e:
-        Path(zip_path).unlink(missing_ok=True)
-        raise HTTPException(status_code=500, detail=f"Failed to create ZIP: {str(e)}")
+
+    # Store entries uncompressed by default - session content is largely
+    # build artifacts that don't deflate well, and skipping zlib makes the
+    # download disk-bound instead of CPU-bound. ?compress=true opts into a
+    # fast deflate for bandwidth-constrained clients.
+    if compress:
+        zip_args = {"compression": zipfile.ZIP_DEFLATED, "compresslevel": 1}
+    else:
+        zip_args = {"compression": zipfile.ZIP_STORED}
+
+    # Build the archive in a worker thread and stream chunks to the client as
+    # they are produced: no temp file, no double disk I/O, and the first bytes
+    # go out before the last file has been compressed.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+    loop = asyncio.get_running_loop()
+
+    def _produce():
+        try:
+            with zipfile.ZipFile(_ZipStreamWriter(queue, loop), 'w', **zip_args) as zipf:
+                _write_session_zip(session_path, zipf)
+        except Exception as e:
+            logger.error(f"ZIP streaming failed for session {session_id}: {e}")
+        finally:
+            # Sentinel so the consumer stops; ignore a stalled client
+            try:
+                asyncio.run_coroutine_threadsafe(queue.put(None), loop).result(
+                    timeout=ZIP_STREAM_CHUNK_TIMEOUT
+                )
+            except Exception:
+                pass
+
+    # Keep a reference so the producer is not garbage collected mid-build; on
+    # client disconnect it times out on its next write and exits on its own.
+    # The semaphore is held for the producer's lifetime to cap concurrent
+    # archive builds.
+    await _ZIP_SEM.acquire()
+    producer = asyncio.create_task(asyncio.to_thread(_produce))
+    _zip_producers.add(producer)
+    producer.add_done_callback(_zip_producers.discard)
+    producer.add_done_callback(lambda _: _ZIP_SEM.release())
+
+    async def zip_stream():
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"session_{session_id}_{timestamp}.zip"
+
+    return StreamingResponse(
+        zip_stream(),
+        media_type='application/zip',
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.post("/sessions/{session_id}/upload", response_model=UploadedArtifacts)
 async def upload_session_to_azure(session_id: str, request: UploadRequest) -> UploadedArtifacts:
@@ -183,18 +390,18 @@ async def upload_session_to_azure(session_id: str, request: UploadRequest) -> Up
     zip_path = temp_zip.name
     temp_zip.close()
     
+    def _build_zip_sync() -> None:
+        # Fast deflate: Azure storage is billed by size, so keep some
+        # compression for uploads, but don't burn CPU on higher levels
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+            _write_session_zip(session_path, zipf)
+
     try:
-        # Create ZIP file with session contents
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in session_path.rglob("*"):
-                if file_path.is_file() and not should_exclude_path(file_path):
-                    try:
-                        relative_path = file_path.relative_to(session_path)
-                        zipf.write(file_path, relative_path)
-                    except (OSError, PermissionError):
-                        logger.debug(f"Skipping file due to access error: {file_path}")
-                        continue
-        
+        # Create ZIP file with session contents off the event loop -
+        # deflation is CPU-bound and would stall every other request
+        async with _ZIP_SEM:
+            await asyncio.to_thread(_build_zip_sync)
+
         # Generate blob name with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         blob_name = f"session_{session_id}_{timestamp}.zip"
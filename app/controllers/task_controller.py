@@ -1,21 +1,37 @@
 import asyncio
 import logging
+import os
+import time
 from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 
 from app.core.config import settings
 from app.models import (
     HealthResponse, Task, TaskResponse, TaskListResponse, TaskLogsResponse, 
     TaskRequest, TaskStatus, CleanupResponse, CleanupFailures
 )
+from app.controllers.session_controller import _list_app_dirs
 from app.services.agent_service import agent_service
 from app.services.websocket_manager import websocket_manager
 
-router = APIRouter(tags=["tasks"])
+# ORJSONResponse keeps serialization of long debug-log payloads and task
+# listings off the slow jsonable_encoder + json.dumps path
+router = APIRouter(tags=["tasks"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+# Admission control for background task execution; excess tasks wait here
+# instead of all running (and forking OpenCode processes) at once
+_task_admission = asyncio.Semaphore(settings.max_concurrent_tasks)
+
+# Seconds a stream connection may sit idle before we probe it with a ping
+WS_RECEIVE_TIMEOUT = 60
+
+# Minimum spacing between per-connection "status" refreshes
+STATUS_REFRESH_INTERVAL = 0.5
+
 
 @router.post("/tasks", response_model=TaskResponse, status_code=201)
 async def create_task(
@@ -31,12 +47,15 @@ async def create_task(
             artifacts_url=task_request.artifacts_url
         )
         
-        # Start execution in background using asyncio with proper task reference storage
-        background_task = asyncio.create_task(agent_service.execute_task(task.id))
-        
+        # Start execution in background, gated by the admission semaphore so
+        # at most settings.max_concurrent_tasks executions run at once
+        async def _run_bounded():
+            async with _task_admission:
+                await agent_service.execute_task(task.id)
+
+        background_task = asyncio.create_task(_run_bounded())
+
         # Store background task reference to prevent garbage collection
-        if not hasattr(agent_service, '_background_tasks'):
-            agent_service._background_tasks = set()
         agent_service._background_tasks.add(background_task)
         background_task.add_done_callback(agent_service._background_tasks.discard)
         
@@ -85,41 +104,56 @@ async def stream_task_logs(websocket: WebSocket, task_id: str):
             None  # No phase info needed since we use status
         )
         
-        # Send existing debug logs if any
+        # Send existing debug logs if any, batched into a single frame so
+        # catchup on a long-running task is one send instead of hundreds
         if task.debug_logs:
-            for debug_log in task.debug_logs:
-                await websocket_manager.send_debug_message(
-                    task_id, 
-                    "DEBUG", 
-                    debug_log
-                )
+            await websocket_manager.send_debug_batch(
+                task_id,
+                "DEBUG",
+                task.debug_logs
+            )
         
-        # Keep connection alive and listen for client messages
-        while True:
-            try:
-                # Wait for client message (ping/pong or close)
-                data = await websocket.receive_text()
-                
+        # Keep connection alive and listen for client messages; the
+        # try/except sits outside the loop so no exception frame is set up
+        # per message
+        last_status_at = 0.0
+        try:
+            while True:
+                # Wait for client message (ping/pong or close); an idle
+                # timeout probes the socket so dead clients are dropped
+                # instead of holding their connection state forever
+                try:
+                    data = await asyncio.wait_for(
+                        websocket.receive_text(), timeout=WS_RECEIVE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    # Send fails (and ends the loop) if the client is gone
+                    await websocket.send_text('{"type": "ping"}')
+                    continue
+
                 # Handle client messages if needed
                 if data == "ping":
                     await websocket.send_text("pong")
                 elif data == "status":
-                    # Send current task status
-                    current_task = await agent_service.get_task(task_id)
-                    if current_task:
-                        await websocket_manager.send_status_update(
-                            task_id,
-                            current_task.status.value,
-                            None  # No phase info needed since we use status
-                        )
-                        
-            except WebSocketDisconnect:
-                break
-            except Exception as e:
-                # Log WebSocket errors but don't expose internal details
-                logger.error(f"WebSocket error for task {task_id}: {e}")
-                break
-                
+                    # Send current task status; rate-limited per connection
+                    # so a chatty client can't turn this into a busy loop
+                    now = time.monotonic()
+                    if now - last_status_at >= STATUS_REFRESH_INTERVAL:
+                        last_status_at = now
+                        current_task = await agent_service.get_task(task_id)
+                        if current_task:
+                            await websocket_manager.send_status_update(
+                                task_id,
+                                current_task.status.value,
+                                None  # No phase info needed since we use status
+                            )
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            # Log WebSocket errors but don't expose internal details;
+            # lazy formatting so the message is only built if emitted
+            logger.debug("WebSocket error for task %s: %s", task_id, e)
+
     except WebSocketDisconnect:
         pass
     finally:
@@ -137,28 +171,40 @@ async def list_tasks() -> TaskListResponse:
 @router.post("/tasks/{task_id}/cancel", response_model=TaskResponse)
 async def cancel_task(task_id: str) -> TaskResponse:
     """Cancel a running task"""
-    success = await agent_service.cancel_task(task_id)
-    if not success:
+    task = await agent_service.cancel_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = await agent_service.get_task(task_id)
+
     return TaskResponse.from_task(task)
 
+def _count_sessions_in(app_dir: str) -> int:
+    """Count session directories inside one app directory (blocking)"""
+    count = 0
+    try:
+        with os.scandir(app_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    count += 1
+    except (OSError, PermissionError):
+        pass
+    return count
+
+async def _count_sessions(session_root) -> int:
+    """Count sessions across all app directories, one thread per directory"""
+    app_dirs = _list_app_dirs(session_root)
+    counts = await asyncio.gather(
+        *(asyncio.to_thread(_count_sessions_in, d) for d in app_dirs)
+    )
+    return sum(counts)
+
 @router.delete("/cleanup/all", response_model=CleanupResponse, status_code=200)
 async def cleanup_all_sessions() -> CleanupResponse:
     """Delete all sessions, tasks, and associated storage (development/maintenance endpoint)"""
     try:
-        # Get count before cleanup for response
-        session_root = settings.session_root
-        session_count = 0
-        
-        # Count sessions
-        for app_dir in session_root.glob("app-*"):
-            if app_dir.is_dir():
-                for session_dir in app_dir.iterdir():
-                    if session_dir.is_dir():
-                        session_count += 1
-        
+        # Get count before cleanup for response; app directories are counted
+        # in parallel worker threads so their I/O waits overlap
+        session_count = await _count_sessions(settings.session_root)
+
         # Clean up via agent service with verification
         deleted_sessions, deleted_tasks, deleted_opencode_storage, failures = await agent_service.cleanup_all_sessions()
         
@@ -1,49 +1,134 @@
+import functools
 import os
 import shutil
 import logging
+import logging.config
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
+
+@functools.lru_cache(maxsize=1)
+def _load_env() -> bool:
+    """Parse the .env file into os.environ exactly once per process"""
+    return load_dotenv()
+
+
 # Load environment variables from .env file
-load_dotenv()
+_load_env()
+
+# Logging handlers are installed once per process, not on every Settings
+# construction - test fixtures and worker reloaders build extra instances
+_CONFIGURED = False
+
+
+def configure_logging(settings: "Settings") -> None:
+    """Install application-wide logging config; idempotent per process
+
+    Called from the FastAPI lifespan rather than at import time so
+    non-serving entry points (scripts, tests) don't mutate the root
+    logger as a side effect of importing this module.
+    """
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "default": {
+                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            },
+        },
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "formatter": "default",
+            },
+        },
+        "root": {
+            "level": settings.log_level,
+            "handlers": ["console"],
+        },
+        "loggers": {
+            # Reduce noise from watchfiles during development
+            "watchfiles.main": {"level": "WARNING"},
+        },
+    })
+    _CONFIGURED = True
 
 # Environment-based configuration
 class Settings:
+    # Fixed attribute set: no per-instance __dict__, faster attribute reads
+    # on hot paths like /health, and typos fail loudly
+    __slots__ = (
+        "session_root",
+        "opencode_command",
+        "opencode_config_path",
+        "opencode_dir",
+        "host",
+        "port",
+        "log_level",
+        "opencode_log_level",
+        "cors_origins",
+        "max_concurrent_tasks",
+        "debug_log_cap",
+        "_opencode_available",
+        "_opencode_checked_at",
+    )
+
+    # Seconds before the PATH probe for the OpenCode binary is redone, so
+    # an install or removal after startup is eventually noticed
+    OPENCODE_PROBE_TTL = 30.0
+
     def __init__(self):
-        self.session_root = Path(os.getenv("SESSION_ROOT", "./sessions"))
-        self.opencode_command = os.getenv("OPENCODE_COMMAND", "opencode")
-        self.opencode_config_path = Path(os.getenv("OPENCODE_CONFIG_PATH", "./opencode.json"))
-        self.opencode_dir = Path(os.getenv("OPENCODE_DIR", "./.opencode"))
-        
-        self.host = os.getenv("HOST", "0.0.0.0")
-        self.port = int(os.getenv("PORT", "5001"))
-        self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-        self.opencode_log_level = os.getenv("OPENCODE_LOG_LEVEL", "WARN").upper()
-        self.cors_origins = os.getenv("CORS_ORIGINS", "*").split(",")
+        # Bind the environment mapping once; each os.getenv call re-enters
+        # the module and re-looks-up os.environ
+        env = os.environ
+        self.session_root = Path(env.get("SESSION_ROOT", "./sessions"))
+        self.opencode_command = env.get("OPENCODE_COMMAND", "opencode")
+        self.opencode_config_path = Path(env.get("OPENCODE_CONFIG_PATH", "./opencode.json"))
+        self.opencode_dir = Path(env.get("OPENCODE_DIR", "./.opencode"))
+
+        self.host = env.get("HOST", "0.0.0.0")
+        self.port = int(env.get("PORT", "5001"))
+        self.log_level = env.get("LOG_LEVEL", "INFO").upper()
+        self.opencode_log_level = env.get("OPENCODE_LOG_LEVEL", "WARN").upper()
+        origins = tuple(
+            stripped
+            for origin in env.get("CORS_ORIGINS", "*").split(",")
+            if (stripped := origin.strip())
+        )
+        # A wildcard anywhere means everything is allowed; collapse so the
+        # CORS middleware takes its allow-all fast path
+        self.cors_origins = ("*",) if "*" in origins else origins
+        # Upper bound on task executions running at once; extra tasks queue
+        # on the admission semaphore instead of fanning out without limit
+        self.max_concurrent_tasks = int(env.get("MAX_CONCURRENT_TASKS", "4"))
+        # Maximum debug-log entries retained per task; oldest entries are
+        # dropped beyond this so long-running tasks don't grow without bound
+        self.debug_log_cap = int(env.get("DEBUG_LOG_CAP", "10000"))
         
         # Ensure required directories exist
         self.session_root.mkdir(parents=True, exist_ok=True)
-        
-        # Setup logging
-        self._setup_logging()
+
+        # Probe PATH for the OpenCode binary now; /health reads the cached
+        # answer and only re-probes after OPENCODE_PROBE_TTL elapses
+        self._opencode_available = shutil.which(self.opencode_command) is not None
+        self._opencode_checked_at = time.monotonic()
     
-    def _setup_logging(self):
-        """Setup application-wide logging configuration"""
-        logging.basicConfig(
-            level=getattr(logging, self.log_level),
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.StreamHandler(),
-            ]
-        )
-        
-        # Reduce noise from watchfiles during development
-        logging.getLogger("watchfiles.main").setLevel(logging.WARNING)
-        
     @property
     def opencode_available(self) -> bool:
-        """Check if OpenCode command is available"""
-        return shutil.which(self.opencode_command) is not None
+        """Whether the OpenCode command is on PATH (cached, re-probed on a TTL)"""
+        now = time.monotonic()
+        if now - self._opencode_checked_at > self.OPENCODE_PROBE_TTL:
+            self._opencode_available = shutil.which(self.opencode_command) is not None
+            self._opencode_checked_at = now
+        return self._opencode_available
+
+    def invalidate_opencode_cache(self) -> None:
+        """Force the next opencode_available read to re-probe PATH"""
+        self._opencode_checked_at = -self.OPENCODE_PROBE_TTL
     
     def validate_paths(self) -> dict:
         """Validate all configured paths and return status"""
@@ -54,4 +139,15 @@ class Settings:
             "opencode_command": self.opencode_available
         }
 
-settings = Settings()
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the process-wide Settings instance on first use"""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # Keep `from app.core.config import settings` working while deferring
+    # construction (env reads, mkdir, logging setup) until first access
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,88 @@
+"""
+Terminal output utilities for the Agent Runtime API.
+
+Helpers for processing raw PTY/terminal output, currently ANSI escape
+sequence stripping used by the auth controller's OpenCode monitors.
+The str and bytes variants implement the same scan; escape sequences are
+ASCII-only, so stripping raw bytes first avoids decoding characters that
+are about to be thrown away.
+"""
+
+import functools
+
+
+@functools.lru_cache(maxsize=256)
+def clean_ansi_codes(text: str) -> str:
+    """Remove ANSI escape codes from text to make it readable"""
+    # Most chunks contain no escape bytes at all - skip the scan entirely
+    if '\x1B' not in text:
+        return text
+
+    # Single-pass scan instead of the regex engine: copy runs of plain text,
+    # then skip either a CSI sequence (ESC [ params intermediates final) or a
+    # single-character escape (ESC @-Z \ - _).
+    parts = []
+    i = 0
+    length = len(text)
+    while i < length:
+        esc = text.find('\x1B', i)
+        if esc == -1:
+            parts.append(text[i:])
+            break
+        parts.append(text[i:esc])
+        j = esc + 1
+        if j < length and text[j] == '[':
+            j += 1
+            while j < length and '0' <= text[j] <= '?':
+                j += 1
+            while j < length and ' ' <= text[j] <= '/':
+                j += 1
+            if j < length and '@' <= text[j] <= '~':
+                i = j + 1  # Final byte consumed, sequence stripped
+            else:
+                # Malformed or truncated sequence - keep the ESC verbatim
+                # and rescan from the next character, like the old regex
+                parts.append(text[esc])
+                i = esc + 1
+        elif j < length and ('@' <= text[j] <= 'Z' or '\\' <= text[j] <= '_'):
+            i = j + 1
+        else:
+            # Bare ESC that is not part of a recognized sequence
+            parts.append(text[esc])
+            i = j
+    return ''.join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def clean_ansi_bytes(data: bytes) -> bytes:
+    """Remove ANSI escape codes from raw terminal bytes, before decoding"""
+    if b'\x1B' not in data:
+        return data
+
+    parts = []
+    i = 0
+    length = len(data)
+    while i < length:
+        esc = data.find(b'\x1B', i)
+        if esc == -1:
+            parts.append(data[i:])
+            break
+        parts.append(data[i:esc])
+        j = esc + 1
+        if j < length and data[j] == 0x5B:  # '['
+            j += 1
+            while j < length and 0x30 <= data[j] <= 0x3F:  # params 0-?
+                j += 1
+            while j < length and 0x20 <= data[j] <= 0x2F:  # intermediates
+                j += 1
+            if j < length and 0x40 <= data[j] <= 0x7E:  # final byte @-~
+                i = j + 1
+            else:
+                parts.append(b'\x1B')
+                i = esc + 1
+        elif j < length and (0x40 <= data[j] <= 0x5A or 0x5C <= data[j] <= 0x5F):
+            i = j + 1  # Single-character escape @-Z \-_
+        else:
+            parts.append(b'\x1B')
+            i = j
+    return b''.join(parts)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+import pydantic.dataclasses
+from pydantic import BaseModel, Field, field_serializer
 from typing import List, Optional, Literal, Dict
 from datetime import datetime
 from enum import Enum
@@ -60,13 +61,22 @@ class TaskRequest(BaseModel):
     session_id: str = Field(..., description="OpenCode session ID to continue or create")
     artifacts_url: Optional[ArtifactsUrl] = Field(default=None, description="Azure Storage SAS URL for artifacts upload")
 
-class SessionFile(BaseModel):
+# Built once per file in large listings; a slotted frozen dataclass skips
+# the per-instance __dict__ a BaseModel would carry
+@pydantic.dataclasses.dataclass(frozen=True, slots=True)
+class SessionFile:
     name: str = Field(..., description="File name")
     path: str = Field(..., description="Relative path from session root")
     size: int = Field(..., description="File size in bytes")
-    modified: datetime = Field(..., description="Last modified timestamp")
+    # Stored as the raw st_mtime float so 10k-file listings don't allocate a
+    # datetime per entry; formatted to ISO only when the response serializes
+    modified: float = Field(..., description="Last modified timestamp (unix epoch seconds)")
     type: str = Field(..., description="File type (file/directory)")
 
+    @field_serializer('modified')
+    def _format_modified(self, value: float) -> str:
+        return datetime.fromtimestamp(value).isoformat()
+
 # Core/Internal Models
 class Task(BaseModel):
     """Core Task model for internal use"""
@@ -108,8 +118,13 @@ class TaskResponse(BaseModel):
     
     @classmethod
     def from_task(cls, task: Task) -> "TaskResponse":
-        """Convert internal Task to API response"""
-        return cls(
+        """Convert internal Task to API response
+
+        Uses model_construct because every field is copied straight from an
+        already-validated Task; re-running validation per response would be
+        pure overhead on list endpoints.
+        """
+        return cls.model_construct(
             id=task.id,
             task_type=task.task_type,
             status=task.status,
@@ -142,14 +157,18 @@ class TaskListResponse(BaseModel):
     tasks: List[TaskResponse] = Field(..., description="List of tasks")
     total_tasks: int = Field(..., description="Total number of tasks")
 
-class DebugMessage(BaseModel):
+# Allocated per streamed log line; slotted frozen dataclasses keep these
+# lightweight compared to full BaseModel instances
+@pydantic.dataclasses.dataclass(frozen=True, slots=True)
+class DebugMessage:
     timestamp: datetime = Field(..., description="Message timestamp")
     level: str = Field(..., description="Log level (DEBUG, INFO, ERROR)")
     message: str = Field(..., description="Debug message content")
     task_id: str = Field(..., description="Associated task ID")
     agent: Optional[str] = Field(default=None, description="Agent name if applicable")
 
-class StreamEvent(BaseModel):
+@pydantic.dataclasses.dataclass(frozen=True, slots=True)
+class StreamEvent:
     event_type: str = Field(..., description="Event type (debug, status, error, complete)")
     data: dict = Field(..., description="Event data")
 
@@ -11,9 +11,9 @@ import tempfile
 import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
-from app.utils.file_utils import should_exclude_path
+from app.utils.file_utils import walk_files
 
 from app.models import Task, TaskType, TaskStatus, TaskPhase, TaskConfiguration, ArtifactsUrl, UploadedArtifacts, SignInMethod, ArtifactType
 from app.services.azure_storage_service import AzureStorageService
@@ -35,6 +35,9 @@ class AgentService:
         self._task_locks: Dict[str, asyncio.Lock] = {}
         # Track running OpenCode processes for graceful shutdown
         self._running_processes: Dict[str, asyncio.subprocess.Process] = {}
+        # Background execution tasks, held so they aren't garbage collected
+        # and can be cancelled on shutdown
+        self._background_tasks: Set[asyncio.Task] = set()
     
     def _get_task_lock(self, task_id: str) -> asyncio.Lock:
         """Get or create a lock for a specific task"""
@@ -105,6 +108,11 @@ class AgentService:
             timestamp = datetime.now().strftime("%H:%M:%S")
             formatted_message = f"[{timestamp}] {message}"
             task.debug_logs.append(formatted_message)
+            # Bound retained logs; trim in blocks so the O(n) del runs once
+            # per ~10% of the cap rather than on every append at the limit
+            cap = settings.debug_log_cap
+            if len(task.debug_logs) > cap + cap // 10:
+                del task.debug_logs[:len(task.debug_logs) - cap]
         
         # Send to WebSocket clients
         try:
@@ -287,15 +295,15 @@ class AgentService:
                 temp_zip.close()
                 
                 try:
-                    # Create ZIP file with entire session contents
+                    # Create ZIP file with entire session contents; walk_files
+                    # prunes excluded directories instead of filtering every
+                    # file under them after the fact
                     with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                        for file_path in session_path.rglob("*"):
-                            if file_path.is_file() and not self._should_exclude_path(file_path):
-                                try:
-                                    relative_path = file_path.relative_to(session_path)
-                                    zipf.write(file_path, relative_path)
-                                except (OSError, PermissionError):
-                                    continue
+                        for entry, relative_path in walk_files(session_path):
+                            try:
+                                zipf.write(entry.path, relative_path)
+                            except (OSError, PermissionError):
+                                continue
                     
                     # Generate blob name with phase and timestamp
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -336,10 +344,6 @@ class AgentService:
             await self._send_debug(task.id, f"Phase upload failed: {str(e)}", level="ERROR")
             return None
     
-    def _should_exclude_path(self, file_path: Path) -> bool:
-        """Check if a path should be excluded from ZIP"""
-        return should_exclude_path(file_path)
-        
     def _handle_file_operation_error(self, operation: str, path: Path, error: Exception):
         """Centralized error handling for file operations"""
         logger.error(f"Failed to {operation} {path}: {error}")
@@ -422,7 +426,12 @@ class AgentService:
         )
         
         self.tasks[task_id] = task
-        
+
+        # New session directory is about to exist - drop the cached listing.
+        # Imported here to avoid a controller<->service import cycle.
+        from app.controllers.session_controller import invalidate_sessions_cache
+        invalidate_sessions_cache()
+
         # Create working directory in our repo
         try:
             working_dir.mkdir(parents=True, exist_ok=True)
@@ -453,11 +462,15 @@ class AgentService:
         """Get all tasks"""
         return list(self.tasks.values())
     
-    async def cancel_task(self, task_id: str) -> bool:
-        """Cancel a running task and terminate its OpenCode process"""
+    async def cancel_task(self, task_id: str) -> Optional[Task]:
+        """Cancel a running task and terminate its OpenCode process
+
+        Returns the updated task, or None if no such task exists, so callers
+        don't need a second get_task round-trip.
+        """
         task = self.tasks.get(task_id)
         if not task:
-            return False
+            return None
         
         # Terminate OpenCode process if running
         if task_id in self._running_processes:
@@ -478,7 +491,7 @@ class AgentService:
         # Update task status
         task.status = TaskStatus.cancelled
         task.updated_at = datetime.now()
-        return True
+        return task
     
     async def execute_task(self, task_id: str) -> bool:
         """Execute a task using OpenCode agents"""
@@ -1,4 +1,5 @@
 import asyncio
+import dataclasses
 import json
 import logging
 from datetime import datetime
@@ -9,52 +10,88 @@ from app.models import DebugMessage, StreamEvent
 logger = logging.getLogger(__name__)
 
 
+# Per-client outbound queue bound; a client this far behind is not keeping
+# up and gets disconnected rather than buffering without limit
+_SEND_QUEUE_MAX = 256
+
+
 class WebSocketManager:
     """Manages WebSocket connections for real-time task streaming"""
-    
+
     def __init__(self):
         # Dictionary mapping task_id to list of connected WebSocket clients
         self.connections: Dict[str, List[WebSocket]] = {}
         # Set of all active connections for cleanup
         self.active_connections: Set[WebSocket] = set()
-    
+        # Per-connection outbound queues and their sender tasks; producers
+        # enqueue without awaiting the socket, one sender drains per client
+        self._send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._sender_tasks: Dict[WebSocket, asyncio.Task] = {}
+
     async def connect(self, websocket: WebSocket, task_id: str):
         """Accept a new WebSocket connection for a specific task"""
         await websocket.accept()
-        
+
         if task_id not in self.connections:
             self.connections[task_id] = []
-        
+
         self.connections[task_id].append(websocket)
         self.active_connections.add(websocket)
-        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_SEND_QUEUE_MAX)
+        self._send_queues[websocket] = queue
+        self._sender_tasks[websocket] = asyncio.create_task(
+            self._drain_send_queue(websocket, queue)
+        )
+
         logger.debug(f"WebSocket connected for task {task_id}. Total connections: {len(self.active_connections)}")
-    
+
     def disconnect(self, websocket: WebSocket, task_id: str):
         """Remove a WebSocket connection"""
         if task_id in self.connections:
             if websocket in self.connections[task_id]:
                 self.connections[task_id].remove(websocket)
-            
+
             # Clean up empty task connection lists
             if not self.connections[task_id]:
                 del self.connections[task_id]
-        
+
         self.active_connections.discard(websocket)
+        self._send_queues.pop(websocket, None)
+        sender = self._sender_tasks.pop(websocket, None)
+        if sender:
+            sender.cancel()
         logger.debug(f"WebSocket disconnected for task {task_id}. Total connections: {len(self.active_connections)}")
-    
+
+    async def _drain_send_queue(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Single sender loop for one client; exits when the socket fails"""
+        try:
+            while True:
+                message = await queue.get()
+                await websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket is gone; the receive loop or stale-connection sweep
+            # will call disconnect for this client
+            pass
+
     async def _send_to_clients(self, task_id: str, message: str):
-        """Send message to all clients for a task, handling disconnections"""
+        """Queue a message for all clients of a task, handling disconnections"""
         if task_id not in self.connections:
             return
-        
+
         disconnected = []
         for websocket in self.connections[task_id]:
+            queue = self._send_queues.get(websocket)
+            if queue is None:
+                disconnected.append(websocket)
+                continue
             try:
-                await websocket.send_text(message)
-            except Exception:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client can't keep up - drop it instead of buffering forever
                 disconnected.append(websocket)
-        
+
         # Clean up disconnected clients
         for ws in disconnected:
             self.disconnect(ws, task_id)
@@ -90,11 +127,29 @@ class WebSocketManager:
         
         event = StreamEvent(
             event_type="debug",
-            data=debug_msg.dict()
+            data=dataclasses.asdict(debug_msg)
         )
         
-        await self._send_to_clients(task_id, json.dumps(event.dict(), default=str))
+        await self._send_to_clients(task_id, json.dumps(dataclasses.asdict(event), default=str))
     
+    async def send_debug_batch(self, task_id: str, level: str, messages: List[str], agent: str = None):
+        """Send multiple debug messages to a task's clients in one frame"""
+        if not messages:
+            return
+
+        event = StreamEvent(
+            event_type="debug_batch",
+            data={
+                "timestamp": datetime.now(),
+                "level": level,
+                "messages": messages,
+                "task_id": task_id,
+                "agent": agent
+            }
+        )
+
+        await self._send_to_clients(task_id, json.dumps(dataclasses.asdict(event), default=str))
+
     async def send_status_update(self, task_id: str, status: str, message: str = None):
         """Send a status update to all clients connected to a specific task"""
         event = StreamEvent(
@@ -107,7 +162,7 @@ class WebSocketManager:
             }
         )
         
-        await self._send_to_clients(task_id, json.dumps(event.dict(), default=str))
+        await self._send_to_clients(task_id, json.dumps(dataclasses.asdict(event), default=str))
     
     async def send_completion(self, task_id: str, success: bool, error: str = None):
         """Send task completion notification"""
@@ -121,7 +176,7 @@ class WebSocketManager:
             }
         )
         
-        await self._send_to_clients(task_id, json.dumps(event.dict(), default=str))
+        await self._send_to_clients(task_id, json.dumps(dataclasses.asdict(event), default=str))
     
     def get_connection_count(self, task_id: str = None) -> int:
         """Get number of active connections for a task or total"""
@@ -5,52 +5,137 @@ This module contains common file operations, path utilities, and constants
 used across multiple modules to avoid code duplication and circular dependencies.
 """
 
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Set
+from typing import FrozenSet, Iterator, List, Tuple
 
 # File and directory exclusion constants
-EXCLUDED_DIRS: Set[str] = {
-    'node_modules', 
-    '.git', 
-    '__pycache__', 
-    '.vscode', 
-    '.idea', 
+EXCLUDED_DIRS: FrozenSet[str] = frozenset({
+    'node_modules',
+    '.git',
+    '__pycache__',
+    '.vscode',
+    '.idea',
     '.opencode'
-}
+})
 
-EXCLUDED_FILES: Set[str] = {
-    'opencode.json', 
+EXCLUDED_FILES: FrozenSet[str] = frozenset({
+    'opencode.json',
     '.gitkeep'
-}
+})
 
 # File handling constants
 TEXT_FILE_ENCODING = 'utf-8'
 
 
-def should_exclude_path(file_path: Path) -> bool:
+def walk_files(root: Path,
+               _excl_dirs: FrozenSet[str] = EXCLUDED_DIRS,
+               _excl_files: FrozenSet[str] = EXCLUDED_FILES) -> Iterator[Tuple[os.DirEntry, str]]:
     """
-    Check if a path should be excluded from processing (ZIP creation, file listing, etc.).
-    
-    This function centralizes the logic for determining which files and directories
-    should be excluded from various operations like artifact creation, session browsing,
-    and file uploads.
-    
+    Recursively yield (entry, relative_path) for every regular file under root.
+
+    Built on os.scandir so entry type and stat information come from the
+    directory read itself instead of costing one extra stat() syscall per
+    file the way Path.rglob + is_file() + stat() does. Relative paths are
+    built by string concatenation, avoiding a Path object per entry.
+
+    Excluded directories are pruned before descending, so subtrees like
+    node_modules are never read at all rather than being listed, stat'ed,
+    and filtered out file by file. Excluded files are skipped by name.
+
     Args:
-        file_path: Path object to check for exclusion
-        
+        root: Directory to walk
+
+    Yields:
+        Tuple of (os.DirEntry for the file, path relative to root)
+    """
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, rel_prefix = stack.pop()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in _excl_dirs:
+                                stack.append((entry.path, rel_prefix + entry.name + os.sep))
+                        elif entry.is_file(follow_symlinks=False):
+                            if entry.name not in _excl_files:
+                                yield entry, rel_prefix + entry.name
+                    except OSError:
+                        # Entry disappeared or is unreadable - skip it
+                        continue
+        except (OSError, PermissionError):
+            continue
+
+
+def walk_files_parallel(root: Path, workers: int = 4,
+                        _excl_dirs: FrozenSet[str] = EXCLUDED_DIRS,
+                        _excl_files: FrozenSet[str] = EXCLUDED_FILES) -> List[Tuple[os.DirEntry, str]]:
+    """
+    Collect (entry, relative_path) for every regular file under root using a
+    small thread pool.
+
+    Same exclusion rules as walk_files, but independent directories are read
+    concurrently, which overlaps the getdents/stat waits that dominate
+    metadata-heavy walks on cold caches and networked storage. Workers
+    pre-fetch entry.stat() so callers reading sizes/mtimes afterwards hit the
+    DirEntry cache instead of issuing another syscall.
+
+    Args:
+        root: Directory to walk
+        workers: Number of walker threads (a small fixed count is enough;
+            the walk is I/O bound, not CPU bound)
+
     Returns:
-        bool: True if the path should be excluded, False otherwise
+        List of (os.DirEntry for the file, path relative to root), unordered
     """
-    # Check if any part of the path contains excluded directories
-    for part in file_path.parts:
-        if part in EXCLUDED_DIRS:
-            return True
-    
-    # Check if the file name is in the excluded files list
-    if file_path.name in EXCLUDED_FILES:
-        return True
-    
-    return False
+    work: queue.Queue = queue.Queue()
+    work.put((str(root), ""))
+    results: List[Tuple[os.DirEntry, str]] = []
+    results_lock = threading.Lock()
+
+    def _worker():
+        while True:
+            item = work.get()
+            if item is None:
+                work.task_done()
+                return
+            dir_path, rel_prefix = item
+            local: List[Tuple[os.DirEntry, str]] = []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in _excl_dirs:
+                                    work.put((entry.path, rel_prefix + entry.name + os.sep))
+                            elif entry.is_file(follow_symlinks=False):
+                                if entry.name not in _excl_files:
+                                    entry.stat()  # Warm the stat cache in-thread
+                                    local.append((entry, rel_prefix + entry.name))
+                        except OSError:
+                            continue
+            except (OSError, PermissionError):
+                pass
+            finally:
+                if local:
+                    with results_lock:
+                        results.extend(local)
+                work.task_done()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(workers):
+            pool.submit(_worker)
+        work.join()
+        # All directories processed - release the workers
+        for _ in range(workers):
+            work.put(None)
+
+    return results
 
 
 def ensure_directory_exists(directory: Path, permissions: int = 0o755) -> None:
@@ -13,7 +13,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
-from app.core.config import settings
+from app.core.config import settings, configure_logging
 from app.controllers.task_controller import router as task_router
 from app.controllers.auth_controller import router as auth_router
 from app.controllers.session_controller import router as session_router
@@ -26,6 +26,7 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown"""
     # Startup
+    configure_logging(settings)
     ensure_directory_exists(settings.session_root)
     logger.info(f"Agent Runtime API started. Sessions: {settings.session_root}")
     logger.info(f"OpenCode command: {settings.opencode_command}")
@@ -102,8 +103,15 @@ if __name__ == "__main__":
     import uvicorn
     
     uvicorn.run(
-        "main:app", 
-        host=settings.host, 
+        "main:app",
+        host=settings.host,
         port=settings.port,
-        log_level=settings.log_level.lower()
+        log_level=settings.log_level.lower(),
+        # uvloop + httptools + the C websockets implementation (all pulled
+        # in by uvicorn[standard]) cut per-send/per-request event-loop
+        # overhead versus the stock asyncio loop. "auto" falls back cleanly
+        # where uvloop isn't available (e.g. Windows dev machines).
+        loop="auto",
+        http="auto",
+        ws="websockets"
     )